@@ -1,4 +1,7 @@
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
 import json
 import os
@@ -6,24 +9,62 @@ import argparse
 import time
 from urllib.parse import quote
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 import tempfile
 import subprocess
 import shutil
-from git import Repo
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("migration.log"),
-        logging.StreamHandler()
-    ]
-)
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
 logger = logging.getLogger("ado-migration")
 
+# Upper bound on PRs migrated at once; keeps us under ADO's throttling limits.
+PR_WORKERS = 20
+# Clones are bound by the remote server, not local CPU; a handful in flight wins almost linearly.
+CLONE_WORKERS = 8
+# Scratch clones go to tmpfs when it has room for them, so the mirror never touches disk.
+SCRATCH_DIR = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+# tmpfs is RAM: only use it when free space covers this multiple of the repo's reported size.
+SCRATCH_HEADROOM = 2
+# How many times a throttled (429, or 503 with Retry-After) call is retried before its response is handed back.
+THROTTLE_RETRIES = 5
+# Below this many remaining TSTUs, pause proactively instead of waiting to be rejected.
+RATE_LIMIT_LOW_WATERMARK = 100
+# PR listings are capped server-side (101 by default), so page through them explicitly.
+PR_PAGE_SIZE = 1000
+
+class ResponseCache:
+    """Source-side GET bodies persisted in SQLite and revalidated with If-None-Match."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, body BLOB)")
+
+    def lookup(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT etag, body FROM responses WHERE url = ?", (url,)).fetchone()
+
+    def store(self, url, etag, body):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses (url, etag, body) VALUES (?, ?, ?)", (url, etag, body))
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Endpoint:
+    """One side of the migration: its pooled session and prebuilt REST URL templates."""
+    name: str
+    headers: dict
+    session: requests.Session
+    urls: dict
+
 class ADOMigrationTool:
-    def __init__(self, source_org, source_project, target_org, target_project, source_pat, target_pat):
+    def __init__(self, source_org, source_project, target_org, target_project, source_pat, target_pat,
+                 pr_workers=PR_WORKERS, clone_workers=CLONE_WORKERS, partial_clone=False,
+                 repo_cache_dir=None, http_cache=None):
         self.source_org = source_org
         self.source_project = source_project
         self.target_org = target_org
@@ -32,106 +73,289 @@ class ADOMigrationTool:
         self.target_pat = target_pat
         self.api_version = "7.1-preview"
 
-        self.source_headers = {
-            'Authorization': 'Basic ' + base64.b64encode(f":{self.source_pat}".encode()).decode(),
+        self.src = self._create_endpoint("source", self.source_org, self.source_project, self.source_pat)
+        self.tgt = self._create_endpoint("target", self.target_org, self.target_project, self.target_pat)
+        self.work_item_map = {}
+        # Repo listings don't change during a run apart from repos we create ourselves.
+        self._repo_cache = {}
+        self.pr_workers = pr_workers
+        self.clone_workers = clone_workers
+        self.partial_clone = partial_clone
+        self.repo_cache_dir = repo_cache_dir
+        # Bytes of tmpfs promised to clones in flight, which disk_usage can't see yet.
+        self._scratch_lock = threading.Lock()
+        self._scratch_reserved = 0
+        self.response_cache = ResponseCache(http_cache) if http_cache else None
+        # Side pool for sub-requests issued from inside PR workers; never waits on itself.
+        self._fetch_pool = ThreadPoolExecutor(max_workers=pr_workers)
+        # Backoff deadline shared by every worker, so one throttled call pauses them all.
+        self._throttle_lock = threading.Lock()
+        self._throttle_until = 0.0
+
+    def _create_endpoint(self, name, org, project, pat):
+        base_url = f"https://dev.azure.com/{org}/{quote(project)}"
+        headers = {
+            'Authorization': 'Basic ' + base64.b64encode(f":{pat}".encode()).decode(),
             'Content-Type': 'application/json'
         }
-        self.target_headers = {
-            'Authorization': 'Basic ' + base64.b64encode(f":{self.target_pat}".encode()).decode(),
-            'Content-Type': 'application/json'
+        repos_url = f"{base_url}/_apis/git/repositories"
+        api_version = f"api-version={self.api_version}"
+        # URL templates; call sites only fill in the ids.
+        urls = {
+            "repos": f"{repos_url}?{api_version}",
+            "pull_requests": repos_url + "/{repo}/pullrequests?" + api_version,
+            "all_pull_requests": repos_url + "/{repo}/pullrequests?searchCriteria.status=all&$top={top}&$skip={skip}&" + api_version,
+            "pull_request": repos_url + "/{repo}/pullrequests/{pr}?" + api_version,
+            "threads": repos_url + "/{repo}/pullrequests/{pr}/threads?" + api_version,
         }
+        return Endpoint(name, headers, self._create_session(headers), urls)
 
-        self.source_base_url = f"https://dev.azure.com/{self.source_org}/{quote(self.source_project)}"
-        self.target_base_url = f"https://dev.azure.com/{self.target_org}/{quote(self.target_project)}"
-        self.work_item_map = {}
+    @staticmethod
+    def _create_session(headers):
+        # One pooled keep-alive session per side so calls don't pay a fresh TLS handshake each time.
+        session = requests.Session()
+        session.headers.update(headers)
+        # 429s are left to _request, which retries every method and shares the backoff across workers.
+        retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                      respect_retry_after_header=True, raise_on_status=False)
+        session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry))
+        return session
+
+    def _throttle(self, delay):
+        with self._throttle_lock:
+            self._throttle_until = max(self._throttle_until, time.monotonic() + delay)
 
-    def list_repos(self, is_source=True):
-        base_url = self.source_base_url if is_source else self.target_base_url
-        headers = self.source_headers if is_source else self.target_headers
-        url = f"{base_url}/_apis/git/repositories?api-version={self.api_version}"
-        response = requests.get(url, headers=headers)
+    def _wait_for_throttle(self):
+        with self._throttle_lock:
+            delay = self._throttle_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    @staticmethod
+    def _header_seconds(value, default):
+        # Retry-After may also be an HTTP-date; anything that isn't a number of seconds gets the default.
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            return default
+
+    def _request(self, method, url, endpoint, **kwargs):
+        if "json" in kwargs:
+            # orjson encodes straight to bytes, several times faster than requests' stdlib json path.
+            # Content-Type: application/json is already set on the session.
+            kwargs["data"] = orjson.dumps(kwargs.pop("json"))
+        for attempt in range(THROTTLE_RETRIES + 1):
+            self._wait_for_throttle()
+            res = endpoint.session.request(method, url, **kwargs)
+            # Throttled requests were rejected before processing, so even POST/PATCH are safe to resend.
+            # Idempotent methods already had their throttled 503s retried by the session adapter.
+            throttled_503 = (res.status_code == 503 and "Retry-After" in res.headers
+                             and method not in Retry.DEFAULT_ALLOWED_METHODS)
+            if res.status_code == 429 or throttled_503:
+                delay = self._header_seconds(res.headers.get("Retry-After"), 2 ** attempt)
+                logger.warning("Throttled on %s %s; retrying in %ss", method, url, delay)
+                self._throttle(delay)
+                continue
+            remaining = self._header_seconds(res.headers.get("X-RateLimit-Remaining"), None)
+            if remaining is not None and remaining < RATE_LIMIT_LOW_WATERMARK:
+                delay = res.headers.get("X-RateLimit-Delay") or res.headers.get("Retry-After")
+                self._throttle(self._header_seconds(delay, 1))
+            return res
+        logger.error("Giving up on %s %s after %s throttled attempts", method, url, THROTTLE_RETRIES + 1)
+        return res
+
+    def _get(self, url, endpoint):
+        # Only the source side is cached: it is read-only for us, while the target changes under our writes.
+        # The URL carries org, project and api-version, so it is a complete cache key.
+        if not (endpoint is self.src and self.response_cache):
+            return self._request("GET", url, endpoint)
+        cached = self.response_cache.lookup(url)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        res = self._request("GET", url, endpoint, headers=headers)
+        if res.status_code == 304 and cached:
+            # Hand callers an ordinary 200 so they don't need to know about the cache.
+            res.status_code = 200
+            res._content = cached[1]
+        elif res.status_code == 200 and res.headers.get("ETag"):
+            self.response_cache.store(url, res.headers["ETag"], res.content)
+        return res
+
+    def list_repos(self, endpoint, refresh=False):
+        if not refresh and endpoint in self._repo_cache:
+            return self._repo_cache[endpoint]
+        url = endpoint.urls["repos"]
+        response = self._get(url, endpoint)
         if response.status_code == 200:
-            repos = response.json()["value"]
-            logger.info(f"Found {len(repos)} repositories in {'source' if is_source else 'target'} project")
+            repos = orjson.loads(response.content)["value"]
+            logger.info("Found %s repositories in %s project", len(repos), endpoint.name)
+            self._repo_cache[endpoint] = repos
             return repos
         else:
-            logger.error(f"Failed to list repositories: {response.status_code} - {response.text}")
+            logger.error("Failed to list repositories: %s - %s", response.status_code, response.text)
             return []
 
     def create_repo(self, repo_name):
-        url = f"{self.target_base_url}/_apis/git/repositories?api-version={self.api_version}"
+        url = self.tgt.urls["repos"]
         data = {"name": repo_name}
-        response = requests.post(url, headers=self.target_headers, json=data)
+        response = self._request("POST", url, self.tgt, json=data)
         if response.status_code == 201:
-            logger.info(f"Created repository: {repo_name}")
-            return response.json()
+            logger.info("Created repository: %s", repo_name)
+            repo = orjson.loads(response.content)
+            if self.tgt in self._repo_cache:
+                self._repo_cache[self.tgt].append(repo)
+            return repo
         else:
-            logger.error(f"Failed to create repository: {response.status_code} - {response.text}")
+            logger.error("Failed to create repository: %s - %s", response.status_code, response.text)
             return None
 
+    @staticmethod
+    def _git(*args, auth=None):
+        # A rejected PAT must fail the clone, not hang a worker on a credential prompt.
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0", "GCM_INTERACTIVE": "never"}
+        if auth:
+            # Passed through the environment so PATs stay out of argv, remote URLs and the mirror's config.
+            # Each header is scoped to its remote, so lazy blob fetches from origin during a push still authenticate.
+            env["GIT_CONFIG_COUNT"] = str(len(auth))
+            for i, (url, header) in enumerate(auth.items()):
+                env[f"GIT_CONFIG_KEY_{i}"] = f"http.{url}.extraHeader"
+                env[f"GIT_CONFIG_VALUE_{i}"] = f"Authorization: {header}"
+        # Protocol v2 skips the full ref advertisement; HTTP/2 lets git multiplex its fetch requests.
+        subprocess.run(["git", "-c", "protocol.version=2", "-c", "http.version=HTTP/2", *args],
+                       check=True, capture_output=True, text=True, env=env)
+
+    def _reserve_scratch(self, size):
+        # Returns (dir, reserved bytes); dir None means the default temp dir on disk.
+        if SCRATCH_DIR is None or size is None:
+            return None, 0
+        needed = size * SCRATCH_HEADROOM
+        with self._scratch_lock:
+            if shutil.disk_usage(SCRATCH_DIR).free - self._scratch_reserved < needed:
+                return None, 0
+            self._scratch_reserved += needed
+        return SCRATCH_DIR, needed
+
+    def _remove_scratch(self, temp_dir, reserved):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        with self._scratch_lock:
+            self._scratch_reserved -= reserved
+
     def clone_repo(self, source_repo, target_repo):
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Cloning repo {source_repo['name']} into {temp_dir}")
+        reserved = 0
+        if self.repo_cache_dir:
+            temp_dir = os.path.join(self.repo_cache_dir, source_repo["id"])
+        else:
+            scratch_dir, reserved = self._reserve_scratch(source_repo.get("size"))
+            temp_dir = tempfile.mkdtemp(dir=scratch_dir)
+        logger.info("Cloning repo %s into %s", source_repo['name'], temp_dir)
         try:
-            source_url = source_repo["remoteUrl"].replace("https://", f"https://:{self.source_pat}@")
-            target_url = target_repo["remoteUrl"].replace("https://", f"https://:{self.target_pat}@")
-            repo = Repo.clone_from(source_url, temp_dir, mirror=True)
-            repo.create_remote("target", target_url)
-            repo.git.push("target", "--mirror")
-            logger.info(f"Repo {source_repo['name']} mirrored successfully")
+            source_url = source_repo["remoteUrl"]
+            target_url = target_repo["remoteUrl"]
+            auth = {source_url: self.src.headers['Authorization'], target_url: self.tgt.headers['Authorization']}
+            # --git-dir rather than -C: git must never walk up into an enclosing repository.
+            git_dir = f"--git-dir={temp_dir}"
+            if self.repo_cache_dir and os.path.isfile(os.path.join(temp_dir, "HEAD")):
+                # Mirror left by a previous run: only fetch what changed since.
+                self._git(git_dir, "remote", "set-url", "origin", source_url)
+                self._git(git_dir, "fetch", "--prune", "origin", auth=auth)
+            else:
+                if self.repo_cache_dir and os.path.isdir(temp_dir):
+                    # Leftover that isn't a bare mirror (e.g. an interrupted clone); start over.
+                    shutil.rmtree(temp_dir)
+                clone_options = ["--mirror"]
+                if self.partial_clone:
+                    clone_options.append("--filter=blob:none")
+                self._git("clone", *clone_options, source_url, temp_dir, auth=auth)
+            self._git(git_dir, "push", "--mirror", "--force", "--no-verify", target_url, auth=auth)
+            logger.info("Repo %s mirrored successfully", source_repo['name'])
             return True
+        except subprocess.CalledProcessError as e:
+            logger.error("Error cloning repo %s: %s", source_repo['name'], e.stderr.strip())
+            return False
         except Exception as e:
-            logger.error(f"Error cloning repo {source_repo['name']}: {str(e)}")
+            logger.error("Error cloning repo %s: %s", source_repo['name'], e)
             return False
         finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            if not self.repo_cache_dir:
+                # Deleting a large mirror takes seconds; don't hold this clone worker for it.
+                # Non-daemon, so the interpreter still waits for cleanup before exiting.
+                threading.Thread(target=self._remove_scratch, args=(temp_dir, reserved)).start()
 
-    def migrate_repos(self):
-        source_repos = self.list_repos(True)
-        target_repos = self.list_repos(False)
+    def migrate_repos(self, source_repos=None, target_repos=None):
+        source_repos = self.list_repos(self.src) if source_repos is None else source_repos
+        target_repos = self.list_repos(self.tgt) if target_repos is None else target_repos
         target_repo_map = {repo["name"]: repo for repo in target_repos}
 
+        # Create missing target repos up front; only the clone+push runs concurrently.
+        pairs = []
         for source_repo in source_repos:
             name = source_repo["name"]
             if name in target_repo_map:
-                logger.info(f"Repo {name} already exists in target.")
+                logger.info("Repo %s already exists in target.", name)
                 target_repo = target_repo_map[name]
             else:
-                logger.info(f"Creating missing repo {name} in target.")
+                logger.info("Creating missing repo %s in target.", name)
                 target_repo = self.create_repo(name)
                 if not target_repo:
                     continue
                 target_repo_map[name] = target_repo
+            pairs.append((source_repo, target_repo))
 
-            if not self.clone_repo(source_repo, target_repo):
-                logger.error(f"Failed to migrate {name}")
+        if not pairs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.clone_workers, len(pairs))) as executor:
+            results = executor.map(lambda pair: self.clone_repo(*pair), pairs)
+            for (source_repo, _), ok in zip(pairs, results):
+                if not ok:
+                    logger.error("Failed to migrate %s", source_repo['name'])
 
-    def list_pull_requests(self, repo_id, is_source=True):
-        base_url = self.source_base_url if is_source else self.target_base_url
-        headers = self.source_headers if is_source else self.target_headers
-        url = f"{base_url}/_apis/git/repositories/{repo_id}/pullrequests?searchCriteria.status=all&api-version={self.api_version}"
-        res = requests.get(url, headers=headers)
-        if res.status_code == 200:
-            return res.json().get("value", [])
-        else:
-            logger.error(f"Failed to list PRs: {res.status_code} - {res.text}")
+    def list_pull_requests(self, repo_id, endpoint):
+        # Returns None on failure: an empty list would read as "no PRs" and defeat the rerun index.
+        # Keyed by id: $skip paging over a live listing can return a PR on two pages.
+        prs = {}
+        skip = 0
+        while True:
+            url = endpoint.urls["all_pull_requests"].format(repo=repo_id, top=PR_PAGE_SIZE, skip=skip)
+            res = self._get(url, endpoint)
+            if res.status_code != 200:
+                logger.error("Failed to list PRs: %s - %s", res.status_code, res.text)
+                return None
+            page = orjson.loads(res.content).get("value", [])
+            # Only an empty page ends the listing: the server may cap $top below PR_PAGE_SIZE.
+            if not page:
+                return list(prs.values())
+            skip += len(page)
+            for pr in page:
+                prs[pr["pullRequestId"]] = pr
+
+    def get_pull_request_threads(self, repo_id, pr_id, endpoint):
+        url = endpoint.urls["threads"].format(repo=repo_id, pr=pr_id)
+        res = self._get(url, endpoint)
+        if res.status_code != 200:
             return []
+        # Every prefetched PR's threads stay in memory until the create phase, so trim them
+        # straight to the payloads add_comments_to_pr posts rather than keep the full thread graph.
+        return [
+            {
+                "comments": [{"content": c["content"], "parentCommentId": c.get("parentCommentId", 0)} for c in thread["comments"]],
+                "status": thread.get("status", "active")
+            }
+            for thread in orjson.loads(res.content).get("value", []) if thread.get("comments")
+        ]
 
-    def get_pull_request_details(self, repo_id, pr_id, is_source=True):
-        base_url = self.source_base_url if is_source else self.target_base_url
-        headers = self.source_headers if is_source else self.target_headers
-        pr_url = f"{base_url}/_apis/git/repositories/{repo_id}/pullrequests/{pr_id}?api-version={self.api_version}"
-        res = requests.get(pr_url, headers=headers)
+    def get_pull_request_details(self, repo_id, pr_id, endpoint):
+        pr_url = endpoint.urls["pull_request"].format(repo=repo_id, pr=pr_id)
+        # The threads URL doesn't depend on the PR body, so fetch both at once.
+        threads_future = self._fetch_pool.submit(self.get_pull_request_threads, repo_id, pr_id, endpoint)
+        res = self._get(pr_url, endpoint)
         if res.status_code != 200:
+            threads_future.cancel()
             return None
-        pr = res.json()
-        threads_url = f"{pr_url}/threads?api-version={self.api_version}"
-        threads_res = requests.get(threads_url, headers=headers)
-        pr["threads"] = threads_res.json()["value"] if threads_res.status_code == 200 else []
+        pr = orjson.loads(res.content)
+        pr["threads"] = threads_future.result()
         return pr
 
     def create_pull_request(self, repo_id, pr):
-        url = f"{self.target_base_url}/_apis/git/repositories/{repo_id}/pullrequests?api-version={self.api_version}"
+        url = self.tgt.urls["pull_requests"].format(repo=repo_id)
         data = {
             "sourceRefName": pr["sourceRefName"],
             "targetRefName": pr["targetRefName"],
@@ -139,59 +363,121 @@ class ADOMigrationTool:
             "description": pr.get("description", ""),
             "status": "active"
         }
-        res = requests.post(url, headers=self.target_headers, json=data)
-        return res.json() if res.status_code == 201 else None
+        res = self._request("POST", url, self.tgt, json=data)
+        return orjson.loads(res.content) if res.status_code == 201 else None
 
     def add_comments_to_pr(self, repo_id, pr_id, threads):
-        for thread in threads:
-            comments = thread.get("comments", [])
-            if not comments:
-                continue
-            url = f"{self.target_base_url}/_apis/git/repositories/{repo_id}/pullrequests/{pr_id}/threads?api-version={self.api_version}"
-            thread_data = {
-                "comments": [{"content": c["content"], "parentCommentId": c.get("parentCommentId", 0)} for c in comments],
-                "status": thread.get("status", "active")
-            }
-            requests.post(url, headers=self.target_headers, json=thread_data)
+        url = self.tgt.urls["threads"].format(repo=repo_id, pr=pr_id)
+        # get_pull_request_threads already trimmed the threads to their create payloads.
+        # Threads are independent of each other, so post them all at once.
+        futures = [self._fetch_pool.submit(self._request, "POST", url, self.tgt, json=thread) for thread in threads]
+        for future in futures:
+            res = future.result()
+            if res.status_code not in (200, 201):
+                logger.error("Failed to add comment thread to PR %s: %s - %s", pr_id, res.status_code, res.text)
 
     def update_pr_status(self, repo_id, pr_id, status):
-        url = f"{self.target_base_url}/_apis/git/repositories/{repo_id}/pullrequests/{pr_id}?api-version={self.api_version}"
+        url = self.tgt.urls["pull_request"].format(repo=repo_id, pr=pr_id)
         data = {"status": status}
-        requests.patch(url, headers=self.target_headers, json=data)
+        self._request("PATCH", url, self.tgt, json=data)
 
-    def migrate_pull_requests(self):
-        source_repos = self.list_repos(True)
-        target_repos = self.list_repos(False)
+    def migrate_pull_requests(self, source_repos=None, target_repos=None):
+        source_repos = self.list_repos(self.src) if source_repos is None else source_repos
+        target_repos = self.list_repos(self.tgt) if target_repos is None else target_repos
         target_repo_map = {r["name"]: r for r in target_repos}
 
+        pairs = []
         for source_repo in source_repos:
             name = source_repo["name"]
             if name not in target_repo_map:
-                logger.warning(f"{name} missing in target. Creating it.")
+                logger.warning("%s missing in target. Creating it.", name)
                 target_repo = self.create_repo(name)
                 if not target_repo:
                     continue
                 target_repo_map[name] = target_repo
             else:
                 target_repo = target_repo_map[name]
+            pairs.append((source_repo, target_repo))
 
-            prs = self.list_pull_requests(source_repo["id"], True)
-            for pr in prs:
-                full = self.get_pull_request_details(source_repo["id"], pr["pullRequestId"], True)
-                if not full:
-                    continue
-                new_pr = self.create_pull_request(target_repo["id"], full)
-                if new_pr and "threads" in full:
-                    self.add_comments_to_pr(target_repo["id"], new_pr["pullRequestId"], full["threads"])
-                    if full["status"] != "active":
-                        self.update_pr_status(target_repo["id"], new_pr["pullRequestId"], full["status"])
+        if not pairs:
+            return
+        # One pool across all repos, so total in-flight work stays bounded however PRs are spread.
+        # Each repo's PRs are queued as soon as its listing is done, and each PR is fetched and
+        # created in one task, so writes start early and details aren't held once migrated.
+        with ThreadPoolExecutor(max_workers=self.pr_workers) as executor:
+            listings = {executor.submit(self._pending_pull_requests, *pair): pair for pair in pairs}
+            for listing in as_completed(listings):
+                source_repo, target_repo = listings[listing]
+                for pr in listing.result():
+                    executor.submit(self._migrate_pending_pr, source_repo, target_repo, pr)
+
+    def _migrate_pending_pr(self, source_repo, target_repo, pr):
+        full = self._fetch_pr_details(source_repo, pr)
+        if full:
+            self._migrate_one_pr(target_repo, full)
+
+    def _pending_pull_requests(self, source_repo, target_repo):
+        try:
+            # Index PRs left by earlier runs once, so reruns don't create duplicates.
+            target_prs = self.list_pull_requests(target_repo["id"], self.tgt)
+            if target_prs is None:
+                logger.error("Skipping PRs for %s: target PRs could not be listed to check for earlier migrations",
+                             source_repo['name'])
+                return []
+            migrated = {(pr["sourceRefName"], pr["targetRefName"], pr["title"])
+                        for pr in target_prs if pr["title"].startswith("[MIGRATED] ")}
+            source_prs = self.list_pull_requests(source_repo["id"], self.src)
+            if source_prs is None:
+                logger.error("Skipping PRs for %s: source PRs could not be listed", source_repo['name'])
+                return []
+            return [pr for pr in source_prs
+                    if (pr["sourceRefName"], pr["targetRefName"], f"[MIGRATED] {pr['title']}") not in migrated]
+        except Exception as e:
+            logger.error("Error listing PRs for %s: %s", source_repo['name'], e)
+            return []
+
+    def _fetch_pr_details(self, source_repo, pr):
+        try:
+            return self.get_pull_request_details(source_repo["id"], pr["pullRequestId"], self.src)
+        except Exception as e:
+            logger.error("Error fetching PR %s in %s: %s", pr['pullRequestId'], source_repo['name'], e)
+            return None
+
+    def _migrate_one_pr(self, target_repo, full):
+        try:
+            new_pr = self.create_pull_request(target_repo["id"], full)
+            if new_pr and "threads" in full:
+                # ADO only creates PRs as active, so closing one still takes a PATCH,
+                # but it doesn't have to wait behind the comment threads.
+                status_future = None
+                if full["status"] != "active":
+                    status_future = self._fetch_pool.submit(
+                        self.update_pr_status, target_repo["id"], new_pr["pullRequestId"], full["status"])
+                self.add_comments_to_pr(target_repo["id"], new_pr["pullRequestId"], full["threads"])
+                if status_future:
+                    status_future.result()
+        except Exception as e:
+            logger.error("Error migrating PR %s to %s: %s", full['pullRequestId'], target_repo['name'], e)
 
     def run_migration(self):
         logger.info("Azure DevOps Migration Started")
-        self.migrate_repos()
-        self.migrate_pull_requests()
+        # The two listings are independent; fetch them side by side.
+        target_future = self._fetch_pool.submit(self.list_repos, self.tgt)
+        source_repos = self.list_repos(self.src)
+        self.migrate_repos(source_repos, target_future.result())
+        # Served from the cache, which already includes repos created above.
+        self.migrate_pull_requests(source_repos, self.list_repos(self.tgt))
         logger.info("Migration completed.")
 
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--source-org', required=True)
@@ -200,17 +486,43 @@ def main():
     parser.add_argument('--target-project', required=True)
     parser.add_argument('--source-pat', required=True)
     parser.add_argument('--target-pat', required=True)
+    # A string default (from the environment) goes through positive_int like a command-line value.
+    parser.add_argument('--clone-jobs', type=positive_int, default=os.environ.get("ADO_CLONE_JOBS", CLONE_WORKERS),
+                        help='Number of repositories to clone and push concurrently (env: ADO_CLONE_JOBS)')
+    parser.add_argument('--partial-clone', action='store_true',
+                        help='Clone with --filter=blob:none; blobs are fetched lazily during push')
+    parser.add_argument('--repo-cache-dir',
+                        help='Keep mirrors here between runs and only fetch new objects on reruns')
+    parser.add_argument('--http-cache',
+                        help='SQLite file caching source API responses; reruns revalidate them by ETag')
     args = parser.parse_args()
 
+    # Configure logging: workers only enqueue records; a listener thread writes them out.
+    log_queue = queue.Queue(-1)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[QueueHandler(log_queue)]
+    )
+    listener = QueueListener(log_queue, logging.FileHandler("migration.log"), logging.StreamHandler())
+    listener.start()
+
     tool = ADOMigrationTool(
         args.source_org,
         args.source_project,
         args.target_org,
         args.target_project,
         args.source_pat,
-        args.target_pat
+        args.target_pat,
+        clone_workers=args.clone_jobs,
+        partial_clone=args.partial_clone,
+        repo_cache_dir=args.repo_cache_dir,
+        http_cache=args.http_cache
     )
-    tool.run_migration()
+    try:
+        tool.run_migration()
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()